@@ -3,7 +3,7 @@ from time import time
 
 from core.exceptions import ChoiceInitializationError
 from core.utils.state_base import State, StateType
-from core.utils.parser import CacheHandler
+from core.utils.parser import CacheHandler, ConditionParser
 
 
 class Choice(State):
@@ -27,10 +27,13 @@ class Choice(State):
         Exception: If the condition evaluation function (jsonpath_wrapper) is not loaded.
     """
 
-    jsonpath_wrapper = None
+    __slots__ = ("jsonpath_wrapper", "cache_handler")
+
+    TIMEOUT = 1
 
     def __init__(self, name: str, statements: list[str], states: dict[str, Any]) -> None:
-        super().__init__(name=name, next_state=None, type=StateType.CHOICE, timeout=1)
+        super().__init__(name, None, StateType.CHOICE, self.TIMEOUT)
+        self.jsonpath_wrapper = None
         self._initialize_handler(name, statements, states)
 
     def handler(self, event: Any, context: dict[str, Any]) -> Any:
@@ -43,23 +46,40 @@ class Choice(State):
 
         raise Exception("Choice - handler - jsonpath_wrapper not loaded.")
 
+    @staticmethod
+    def prepare(name: str, statements: list[str], states: dict[str, Any]) -> None:
+        """
+        Validate the statements and generate their cached condition code without loading it,
+        so malformed conditions are reported before the choice is built.
+
+        Raises:
+            ChoiceInitializationError: If the statements cannot be parsed.
+        """
+        try:
+            cache_handler = CacheHandler(name, statements, states)
+            cache_handler.generate_hash()
+            # A valid cache entry is returned as is; only well-formed conditions are ever cached
+            ConditionParser(cache_handler).parse()
+
+        except Exception as e:
+            raise ChoiceInitializationError(
+                f"Failed to initialize choice: {str(e)}") from e
+
     def _initialize_handler(self, name: str, statements: list[str], states: dict[str, Any]):
 
         self.cache_handler = CacheHandler(name, statements, states)
+        # Hash up front so a warm cache is found on the first load attempt
+        self.cache_handler.generate_hash()
 
-        count = 0
-        while count <= 1 and self.jsonpath_wrapper is None:
-
+        try:
             try:
                 self.jsonpath_wrapper = self.cache_handler.load_cached_function()
-                return None
 
             except FileNotFoundError:
-                from core.utils.parser import ConditionParser
                 condition_handler = ConditionParser(self.cache_handler)
                 condition_handler.parse()
-                count += 1
+                self.jsonpath_wrapper = self.cache_handler.load_cached_function()
 
-            except Exception as e:
-                raise ChoiceInitializationError(
-                    f"Failed to initialize choice: {str(e)}") from e
+        except Exception as e:
+            raise ChoiceInitializationError(
+                f"Failed to initialize choice: {str(e)}") from e
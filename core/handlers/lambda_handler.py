@@ -1,7 +1,7 @@
 from typing import Any, Optional
 from time import time
-from pathlib import Path
 import importlib.util
+import os
 
 from core.utils.state_base import State, StateType
 
@@ -19,13 +19,10 @@ class Lambda(State):
         _handler (callable | None): Cached handler function for the Lambda.
     """
 
+    __slots__ = ("_handler",)
+
     def __init__(self, name: str, next_state: str | None, lambda_path: str, timeout: Optional[int] = None) -> None:
-        super().__init__(
-            name=name,
-            next_state=next_state,
-            type=StateType.LAMBDA,
-            timeout=timeout
-        )
+        super().__init__(name, next_state, StateType.LAMBDA, timeout)
         self._handler = None
         self._load_lambda(lambda_path)
 
@@ -68,12 +65,11 @@ class Lambda(State):
         """
 
         lambda_name = self.name
-        full_path = Path(lambda_path) / lambda_name / "main.py"
-        lambda_file_path = Path(full_path)
+        lambda_file_path = os.path.join(lambda_path, lambda_name, "main.py")
 
-        if not lambda_file_path.exists():
+        if not os.path.isfile(lambda_file_path):
             raise ModuleNotFoundError(
-                f"Lambda - _load_lambda - {full_path} não encontrado")
+                f"Lambda - _load_lambda - {lambda_file_path} não encontrado")
 
         spec = importlib.util.spec_from_file_location(
             lambda_name, lambda_file_path)
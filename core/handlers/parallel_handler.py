@@ -22,6 +22,8 @@ class Parallel(State):
             Runs all workflows in parallel, waits for completion or timeout, and returns a dictionary mapping workflow names to their results.
     """
 
+    __slots__ = ("_workflows",)
+
     def __init__(self, name: str, next_state: Optional[str], workflows: list[StateMachine]):
 
         self._workflows = workflows
@@ -30,12 +32,7 @@ class Parallel(State):
         for w in workflows:
             timeout += w.timeout
 
-        super().__init__(
-            name=name,
-            next_state=next_state,
-            type=StateType.PARALLEL,
-            timeout=timeout + 1
-        )
+        super().__init__(name, next_state, StateType.PARALLEL, timeout + 1)
 
     def handler(self, event: Any, context: dict[str, Any]) -> Any:
         """
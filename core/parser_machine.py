@@ -1,12 +1,83 @@
 
-from pathlib import Path
-from typing import Any, Callable
-import yaml
+import functools
+import marshal
+import os
+import re
+import sys
+from typing import Any, Callable, Iterable
 from core.handlers.choice_handler import Choice
 from core.handlers.lambda_handler import Lambda
 from core.handlers.parallel_handler import Parallel
 from core.state_machine import StateMachine
-from logging_config import error, info
+from core.utils.file_utils import write_atomic
+from core.utils.state_base import LazyState, State, StateType
+from logging_config import error, info_lazy
+
+_HASH_WORD_RE = re.compile(r'#\w+(?:-\w+)*')
+_REQUIRED_FIELDS = frozenset({'name', 'lambda_dir', 'tree', 'states'})
+
+
+def _compile_reference_pattern(state_keys: Iterable[str]) -> re.Pattern:
+    """
+    Build one pattern whose first group captures a known state reference.
+    Any other hash word still matches, with the group left empty.
+    """
+    # Longest keys first so a key is never shadowed by one of its prefixes
+    known = '|'.join(
+        re.escape(key) for key in sorted(state_keys, key=len, reverse=True))
+    return re.compile(rf'#({known})(?!\w|-\w)|{_HASH_WORD_RE.pattern}')
+
+
+def _intern_strings(node: Any) -> Any:
+    """Recursively rebuild mappings and lists so every string key and value is interned."""
+    if isinstance(node, dict):
+        return {
+            sys.intern(key) if isinstance(key, str) else key: _intern_strings(value)
+            for key, value in node.items()
+        }
+    if isinstance(node, list):
+        return [_intern_strings(item) for item in node]
+    if isinstance(node, str):
+        return sys.intern(node)
+    return node
+
+
+def _read_definitions(path: str, version: tuple[int, int]) -> Any:
+    """
+    Read a YAML file through a marshalled copy stored next to it.
+    The copy records the YAML's (mtime_ns, size) and is only used on an exact match, and rewritten otherwise.
+    Marshal is used rather than pickle because loading it cannot run code.
+    """
+    sidecar_path = f"{path}.cache.marshal"
+    try:
+        with open(sidecar_path, 'rb') as file:
+            cached_version, data = marshal.load(file)
+        if cached_version == version:
+            return data
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+
+    # PyYAML is imported on a sidecar miss only, keeping it off the warm start path
+    import yaml
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+    with open(path, 'rb') as file:
+        data = yaml.load(file, Loader=loader)
+
+    try:
+        write_atomic(sidecar_path, marshal.dumps((version, data)))
+    except (OSError, ValueError):
+        # The sidecar is only an accelerator, e.g. the directory may be read-only
+        # or the YAML may hold values marshal cannot store, such as timestamps
+        pass
+
+    return data
+
+
+@functools.lru_cache(maxsize=32)
+def _load_yaml_cached(path: str, version: tuple[int, int]) -> dict[str, Any]:
+    """Load a YAML file once per (path, (mtime_ns, size)) pair, interning its strings."""
+    return _intern_strings(_read_definitions(path, version))
 
 
 class StateConfigurationProcessor:
@@ -15,54 +86,77 @@ class StateConfigurationProcessor:
     Handles lambda, choice, and parallel states, managing variables and state transitions.
     """
 
+    __slots__ = (
+        "variables", "state_definitions", "lambda_directory",
+        "this_state", "this_state_name", "next_state_name",
+        "_name_by_key", "_lambda_names", "_reference_re", "_quoted_by_reference",
+    )
+
     def __init__(self, state_definitions: dict[str, Any], variables: dict[str, Any] | None, lambda_directory: str) -> None:
         """Initialize the processor with state definitions, variables, and lambda directory."""
-        self.execution_blocks = []
         self.variables = variables if variables else {}
         self.state_definitions = state_definitions
         self.lambda_directory = lambda_directory
+        self._name_by_key = {
+            key: state['name'] for key, state in state_definitions.items()
+        }
+        self._lambda_names: frozenset[str] | None = None
+        self._reference_re: re.Pattern | None = None
+        self._quoted_by_reference: dict[str, str] | None = None
 
     def set_state(self, current_state_key: str, next_state_key: str | None) -> None:
         """Set the current and next state based on provided keys."""
         try:
             self.this_state = self.state_definitions[current_state_key]
-            self.next_state = self.state_definitions.get(next_state_key or '')
+            self.this_state_name = self._name_by_key[current_state_key]
+            self.next_state_name = self._name_by_key.get(next_state_key or '')
         except KeyError as e:
             error(f"State key not found: {e}")
             raise
 
-    def _process_lambda_state(self) -> None:
-        """Process a lambda state and append it to execution blocks."""
+    def _process_lambda_state(self) -> State:
+        """Process a lambda state and return its execution block."""
         try:
-            state_name = self.this_state['name']
-            lambda_full_path = Path(self.lambda_directory) / state_name / "main.py"  # nopep8
-            lambda_file_path = Path(lambda_full_path)
+            state_name = self.this_state_name
 
-            if not lambda_file_path.exists():
+            if state_name not in self._available_lambdas():
+                lambda_full_path = os.path.join(
+                    self.lambda_directory, state_name, "main.py")
                 error(f"Lambda {lambda_full_path} not found.")
                 raise ModuleNotFoundError(
                     f"Lambda {lambda_full_path} not found.")
 
-            lambda_config: dict[str, Any] = {
-                "name": state_name,
-                "next_state": self.next_state['name'] if self.next_state else None,
-                "lambda_path": self.lambda_directory,
-            }
-
+            next_state_name = self.next_state_name
             timeout_value = self.this_state.get('timeout')
-            if timeout_value:
-                lambda_config['timeout'] = int(timeout_value)
+            timeout = int(timeout_value) if timeout_value else None
 
-            self.execution_blocks.append(Lambda(**lambda_config))
-            info(f"Lambda state processed: {state_name}")
+            # main.py is known to exist; the module is only imported when the state first runs
+            block = LazyState(
+                Lambda,
+                (state_name, next_state_name, self.lambda_directory, timeout),
+                state_name, next_state_name, StateType.LAMBDA, timeout)
+            info_lazy("Lambda state processed: %s", state_name)
+            return block
         except Exception as e:
             error(f"Error processing lambda state: {e}")
             raise
 
-    def _process_choice_state(self, conditions: str) -> None:
-        """Process a choice state and append it to execution blocks."""
+    def _available_lambdas(self) -> frozenset[str]:
+        """Scan the lambda directory once and return the names of its sub-directories holding a main.py."""
+        if self._lambda_names is None:
+            try:
+                with os.scandir(self.lambda_directory) as entries:
+                    self._lambda_names = frozenset(
+                        entry.name for entry in entries
+                        if entry.is_dir() and os.path.isfile(os.path.join(entry.path, "main.py")))
+            except FileNotFoundError:
+                self._lambda_names = frozenset()
+        return self._lambda_names
+
+    def _process_choice_state(self, conditions: str) -> State:
+        """Process a choice state and return its execution block."""
         try:
-            choice_name = self.this_state['name']
+            choice_name = self.this_state_name
             conditions_list = self.variables.get(conditions)
 
             if conditions_list is None:
@@ -71,51 +165,68 @@ class StateConfigurationProcessor:
                 raise ValueError(
                     f"Conditions for choice {choice_name} do not exist!")
 
-            for i in range(len(conditions_list)):
-                hash_words = self._extract_hash_words(conditions_list[i])
-                for word in hash_words:
-                    state_name = self.state_definitions[word[1:]]['name']
-                    conditions_list[i] = conditions_list[i].replace(
-                        word, f"'{state_name}'")
+            statements = [
+                self._replace_state_references(statement)
+                for statement in conditions_list
+            ]
 
-            self.execution_blocks.append(
-                Choice(choice_name, conditions_list, self.state_definitions))
-            info(f"Choice state processed: {choice_name}")
+            # Conditions are validated and their code generated now; only loading it waits for the first run
+            Choice.prepare(choice_name, statements, self.state_definitions)
+            block = LazyState(
+                Choice,
+                (choice_name, statements, self.state_definitions),
+                choice_name, None, StateType.CHOICE, Choice.TIMEOUT)
+            info_lazy("Choice state processed: %s", choice_name)
+            return block
         except Exception as e:
             error(f"Error processing choice state: {e}")
             raise
 
-    def _process_parallel_state(self, parse_machine: Callable, machine_definitions: dict[str, Any] | None) -> None:
-        """Process a parallel state and append it to execution blocks."""
+    def _process_parallel_state(self, parse_machine: Callable, machine_definitions: dict[str, Any]) -> State:
+        """Process a parallel state and return its execution block."""
         try:
-            if machine_definitions is None:
-                error("machine_definitions is None in parallel state.")
-                raise ValueError(
-                    "machine_definitions is None in parallel state.")
-
             workflows = [
                 parse_machine(machine_definitions[workflow])
                 for workflow in self.this_state['workflows']
             ]
 
-            parallel_conf = {
-                "name": self.this_state['name'],
-                "next_state": self.next_state['name'] if self.next_state else None,
-                "workflows": workflows
-            }
-
-            self.execution_blocks.append(Parallel(**parallel_conf))
-            info(f"Parallel state processed: {self.this_state['name']}")
+            block = Parallel(
+                self.this_state_name, self.next_state_name, workflows)
+            info_lazy("Parallel state processed: %s", block.name)
+            return block
         except Exception as e:
             error(f"Error processing parallel state: {e}")
             raise
 
-    def _extract_hash_words(self, text: str) -> list[str]:
-        """Extract hash words (e.g., #state) from a string."""
-        import re
-        pattern = r'#\w+(?:-\w+)*'
-        matches = re.findall(pattern, text)
-        return matches
+    def _replace_state_references(self, statement: str) -> str:
+        """Replace every hash word (e.g., #state) with its quoted state name in a single pass."""
+        if '#' not in statement:
+            return statement
+
+        if self._quoted_by_reference is None:
+            intern = sys.intern
+            self._quoted_by_reference = {
+                intern(f"#{key}"): f"'{name}'" for key, name in self._name_by_key.items()
+            }
+
+        # Fast path: every reference is a whole space-separated token
+        quoted = self._quoted_by_reference
+        tokens = statement.split(' ')
+        if all(token in quoted for token in tokens if '#' in token):
+            return ' '.join([quoted.get(token, token) for token in tokens])
+
+        if self._reference_re is None:
+            self._reference_re = _compile_reference_pattern(self._name_by_key)
+        return self._reference_re.sub(self._resolve_state_reference, statement)
+
+    def _resolve_state_reference(self, match: re.Match) -> str:
+        """Return the quoted state name for a matched hash word."""
+        reference = match.group(0)
+        if match.group(1) is None:
+            raise KeyError(
+                f"State reference '{reference}' not found in states")
+        # A known reference matches exactly '#key', so the prebuilt quoted name is reused
+        return self._quoted_by_reference[reference]
 
 
 class StateMachineParser:
@@ -124,17 +235,34 @@ class StateMachineParser:
     Handles loading, parsing, and building the execution tree for the state machine.
     """
 
+    __slots__ = ("data", "machine", "_parse_cache")
+
     data: dict[str, Any]
     machine: dict[str, Any]
+    _parse_cache: dict[int, StateMachine]
+
+    # State type -> adapter calling the matching processor method with the arguments it needs
+    _DISPATCH: dict[str, Callable[['StateMachineParser', StateConfigurationProcessor, str | None], State]] = {
+        'lambda': lambda parser, processor, next_state: processor._process_lambda_state(),
+        'choice': lambda parser, processor, next_state: processor._process_choice_state(next_state),
+        'parallel': lambda parser, processor, next_state: processor._process_parallel_state(parser.parse_machine, parser.data),
+    }
 
     def __init__(self, machine_definitions_file: str) -> None:
         """Initialize the parser with the path to the machine definitions YAML file."""
         try:
             data = self._load_data(machine_definitions_file)
+
+            # Validated once here so per-state processing can rely on it
+            if not isinstance(data, dict):
+                raise ValueError(
+                    f"{machine_definitions_file} does not contain machine definitions.")
+
             self.machine = data[data['entry']]
             self.data = data
-            info(
-                f"StateMachineParser - __init__ - Loaded machine definitions from {machine_definitions_file}")
+            self._parse_cache = {}
+            info_lazy(
+                "StateMachineParser - __init__ - Loaded machine definitions from %s", machine_definitions_file)
         except Exception as e:
             error(
                 f"StateMachineParser - __init__ - Error initializing StateMachineParser: {e}")
@@ -143,6 +271,8 @@ class StateMachineParser:
     def parse(self) -> StateMachine:
         """Parse the loaded machine definition and return a StateMachine object."""
         try:
+            # Workflows shared between parallel states are parsed once per call
+            self._parse_cache = {}
             return self.parse_machine(self.machine)
         except Exception as e:
             error(f"StateMachineParser - parse - Error parsing machine: {e}")
@@ -150,55 +280,70 @@ class StateMachineParser:
 
     def parse_machine(self, machine_config: dict[str, Any]) -> StateMachine:
         """Parse a machine configuration and return a StateMachine object."""
+        cache_key = id(machine_config)
+        cached_machine = self._parse_cache.get(cache_key)
+        if cached_machine is not None:
+            return cached_machine
+
         try:
+            missing = _REQUIRED_FIELDS - machine_config.keys()
+            if missing:
+                raise ValueError(
+                    f"Missing required fields: {sorted(missing)}")
+
             name = machine_config['name']
             execution_tree = machine_config['tree']
+            states = machine_config['states']
+
+            # Local for the per-state loop below
+            build_block = self._build_block
 
             state_processor = StateConfigurationProcessor(
-                state_definitions=machine_config['states'],
+                state_definitions=states,
                 variables=machine_config.get('vars'),
                 lambda_directory=machine_config['lambda_dir']
             )
 
-            for current_state, next_state in execution_tree.items():
-                try:
-                    state_processor.set_state(current_state, next_state)
-                    state_type = state_processor.this_state['type']
-                    method = getattr(
-                        state_processor, f"_process_{state_type}_state")
-                    if state_type == 'lambda':
-                        method()
-                    elif state_type == 'choice':
-                        method(next_state)
-                    elif state_type == 'parallel':
-                        method(self.parse_machine, self.data)
-                except Exception as e:
-                    error(
-                        f"StateMachineParser - parse_machine - Error processing state '{current_state}': {e}")
-                    raise
-
-            info(f"State machine '{name}' parsed successfully.")
-            return StateMachine(name, state_processor.execution_blocks)
+            execution_blocks = [
+                build_block(state_processor, current_state, next_state)
+                for current_state, next_state in execution_tree.items()
+            ]
+
+            machine = StateMachine(name, execution_blocks)
+            self._parse_cache[cache_key] = machine
+
+            info_lazy("State machine '%s' parsed successfully.", name)
+            return machine
         except Exception as e:
             error(
                 f"StateMachineParser - parse_machine - Error parsing machine config: {e}")
             raise
 
+    def _build_block(self, state_processor: StateConfigurationProcessor, current_state: str, next_state: str | None) -> State:
+        """Build the execution block for one edge of the execution tree."""
+        try:
+            state_processor.set_state(current_state, next_state)
+            state_type = state_processor.this_state['type']
+            process_state = self._DISPATCH.get(state_type)
+            if process_state is None:
+                raise ValueError(
+                    f"Unsupported state type: {state_type}")
+            return process_state(self, state_processor, next_state)
+        except Exception as e:
+            error(
+                f"StateMachineParser - parse_machine - Error processing state '{current_state}': {e}")
+            raise
+
     def _load_data(self, machine_definitions_file: str):
         """Load and return data from the given machine definitions YAML file."""
         err_msg = "StateMachineParser - _load_data - "
         try:
-            with open(machine_definitions_file, 'r') as file:
-                return yaml.safe_load(file)
+            stat = os.stat(machine_definitions_file)
+            return _load_yaml_cached(
+                machine_definitions_file, (stat.st_mtime_ns, stat.st_size))
         except FileNotFoundError:
             error(f"{err_msg}Error: {machine_definitions_file} not found.")
             raise
-        except yaml.YAMLError as e:
-            error(f"{err_msg}Error parsing YAML: {e}")
-            raise
         except KeyError as e:
             error(f"{err_msg}Key error! {str(e)}")
             raise
-        except Exception as e:
-            error(f"{err_msg}Error: {str(e)}")
-            raise
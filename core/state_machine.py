@@ -1,3 +1,4 @@
+import sys
 import time as t
 import concurrent.futures
 from typing import Any, Optional, Sequence
@@ -5,7 +6,7 @@ import uuid
 
 from core.exceptions import StateMachineExecutionError, StateNotFoundError
 from core.utils.state_base import State
-from logging_config import error, info, warning
+from logging_config import debug, debug_enabled, error, info, info_lazy, warning
 
 
 class StateMachine:
@@ -45,6 +46,9 @@ class StateMachine:
 
         states_timeout_sum = 0
         for l in machine_tree:
+            # Interned names let the per-step tree lookup short-circuit on identity
+            l.name = sys.intern(l.name)
+            l.next_state = sys.intern(l.next_state) if l.next_state else None
             self.machine_tree[l.name] = l
             states_timeout_sum += l.timeout
 
@@ -93,11 +97,16 @@ class StateMachine:
                 )
                 raise StateNotFoundError(f"State {next_state} does not exist!")
 
-            info(f">>> Entering state <{next_state}>")
+            info_lazy(">>> Entering state <%s>", next_state)
 
             try:
 
                 step_start_time = t.time()
+                # Handlers may mutate the event in place, so its input is rendered up front
+                event_in = repr(event) if debug_enabled() else None
+
+                # Deferred states are built here, so building is not charged to the state timeout
+                step_lambda.materialize()
 
                 with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
                     # ----------------------------------------------ACT
@@ -123,14 +132,15 @@ class StateMachine:
                 # ----------------------------------------
                 step_duration = t.time() - step_start_time
 
-                info(
-                    f"<<< Exiting state [{context['state_name']} ({step_duration} s)]")
-                info(event)
+                info_lazy("<<< Exiting state [%s (%s s)]",
+                          context['state_name'], step_duration)
+                debug("STATE %s in=%s out=%r ctx=%r",
+                      context['state_name'], event_in, event, context)
 
                 if next_state is None:
                     total_duration = t.time() - start_time
-                    info(
-                        f"\n\n## Execution completed successfully in {total_duration} s.\n")
+                    info_lazy(
+                        "\n\n## Execution completed successfully in %s s.\n", total_duration)
                     info(event)
                     return event
 
@@ -0,0 +1,23 @@
+import os
+import tempfile
+
+# Read once at import, since os.umask can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def write_atomic(path: str, content: str | bytes) -> None:
+    """Write content to a temporary file and move it over path, so readers never see a partial file"""
+    # A unique temporary name per call, so concurrent writers never share one
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), prefix=f"{os.path.basename(path)}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb' if isinstance(content, bytes) else 'w') as f:
+            f.write(content)
+        # mkstemp creates 0600 files; give them the mode a plain open() would
+        os.chmod(tmp_path, 0o666 & ~_UMASK)
+        os.replace(tmp_path, path)
+    except OSError:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
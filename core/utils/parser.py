@@ -1,19 +1,131 @@
 import re
 import os
+import ast
+import functools
+import glob
 import json
 import hashlib
 import importlib.util
-from pathlib import Path
-from typing import Any
+import shutil
+from types import ModuleType
+from typing import Any, Callable
 from jsonpath_ng import parse
+from core.utils.file_utils import write_atomic
 from logging_config import info, warning
 
+# Created lazily by _save_to_cache, since clear_all_cache removes it
+_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'conditions_cache')
+
+_WHEN_THEN_RE = re.compile(r'when\s+(.*?)\s+then\s+(.*)', re.DOTALL)
+_CONTAINS_RE = re.compile(r'\s*(.+?)\s+contains\s+(.+?)\s*$')
+_CONSTANT_RE = re.compile(r'\#\S*')
+_JSONPATH_VARIABLE_RE = re.compile(r'\$\.\S*')
+_SIMPLE_JSONPATH_RE = re.compile(r'\$(?:\.[a-zA-Z_][a-zA-Z0-9_]*)+')
+_EXIST_RE = re.compile(r'\bexist\s+(\S+)')
+_TERM = r"(#[\w-]+|'[^']*')"
+_TERMINAL_RE = re.compile(_TERM)
+_EQ_CASE_RE = re.compile(
+    r"when (\$\.[a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*) eq ('[^']*'|-?\d+(?:\.\d+)?)"
+    rf" then {_TERM}(?: else {_TERM})?")
+# Below this many equality cases a plain if-chain is as fast as a dict lookup
+_DISPATCH_TABLE_MIN_CASES = 4
+_JSONPATH_OR_CONSTANT_RE = re.compile(r'(\$\.\S*)|(\#\S*)')
+_NON_IDENTIFIER_RE = re.compile(r'[^a-zA-Z0-9_]')
+_SINGLE_WORD_PARENS_RE = re.compile(r'\(\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\)')
+_JSONPATH_PARAM_RE = re.compile(
+    r'\$\.([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)')
+_STARTS_WITH_QUOTED_RE = re.compile(r'(\w+)\s+starts_with\s+(\'[^\']*\')')
+_STARTS_WITH_WORD_RE = re.compile(r'(\w+)\s+starts_with\s+(\w+)')
+_ENDS_WITH_QUOTED_RE = re.compile(r'(\w+)\s+ends_with\s+(\'[^\']*\')')
+_ENDS_WITH_WORD_RE = re.compile(r'(\w+)\s+ends_with\s+(\w+)')
+# Longer operators come first so 'gte' is never read as 'gt'
+_COMPARISON_OP_RE = re.compile(r'\s+(gte|lte|neq|gt|lt|eq)\s+')
+_COMPARISON_OPS = {
+    'gt': ' > ',
+    'lt': ' < ',
+    'eq': ' == ',
+    'neq': ' != ',
+    'gte': ' >= ',
+    'lte': ' <= ',
+}
+
+# Compiled JSONPath expressions are immutable, so they are shared across queries
+_parse_jsonpath = functools.lru_cache(maxsize=4096)(parse)
+
+# Quoted strings are matched whole so literal words inside them are left untouched
+_LITERAL_TERM_RE = re.compile(r"'[^']*'| (true|false|null)\b")
+_LITERAL_TERMS = {'true': ' True', 'false': ' False', 'null': ' None'}
+
+
+def _replace_literal_term(match: re.Match) -> str:
+    term = match[1]
+    return match[0] if term is None else _LITERAL_TERMS[term]
+
+
+@functools.lru_cache(maxsize=8192)
+def _jsonpath_to_param(jsonpath: str) -> str:
+    """Convert a JSONPath such as $.user.name into its parameter name _user_name"""
+    return _NON_IDENTIFIER_RE.sub('_', jsonpath[1:])
+
+
+def _replace_jsonpath(match: re.Match) -> str:
+    return _jsonpath_to_param(match.group(0))
+
+
+# metadata path -> ((ino, mtime_ns, size), metadata); one entry per choice name
+_METADATA_CACHE: dict[str, tuple[tuple[int, int, int], dict[str, Any]]] = {}
+
+
+def _file_version(path: str) -> tuple[int, int, int]:
+    """
+    Identify the current content of a file by (inode, mtime_ns, size).
+    write_atomic always creates a new inode, so rewrites are seen even with coarse timestamps.
+    """
+    stat = os.stat(path)
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def _read_metadata(metadata_path: str) -> dict[str, Any]:
+    """Load a metadata file, re-reading it only when the file changed"""
+
+    version = _file_version(metadata_path)
+
+    cached = _METADATA_CACHE.get(metadata_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with open(metadata_path, 'r') as f:
+        metadata = json.load(f)
+
+    _METADATA_CACHE[metadata_path] = (version, metadata)
+    return metadata
+
+
+# (safe name, content hash) -> jsonpath wrapper built by load_cached_function
+_WRAPPER_CACHE: dict[tuple[str, str], Callable] = {}
+
+
+@functools.lru_cache(maxsize=256)
+def _load_module(cache_file_path: str, version: tuple[int, int, int]) -> ModuleType:
+    """Execute a generated module once per (path, _file_version) pair"""
+
+    spec = importlib.util.spec_from_file_location(
+        "cached_module", cache_file_path)
+
+    if spec is None or spec.loader is None:
+        raise ImportError(
+            f"CacheHandler - load_cached_function - Could not load spec from {cache_file_path}")
+
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
 
 class Utils:
 
     @staticmethod
-    def _match(pattern, text) -> list[str]:
-        matches = re.findall(pattern, text)
+    def _match(pattern: re.Pattern, text: str) -> list[str]:
+        matches = pattern.findall(text)
         return matches
 
     @staticmethod
@@ -22,16 +134,32 @@ class Utils:
         Extracts all constants from the given text that match the pattern of a '#' followed by non-whitespace characters.
         """
 
-        pattern = r'\#\S*'
-        return Utils._match(pattern, text)
+        return Utils._match(_CONSTANT_RE, text)
 
     @staticmethod
     def extract_jsonpath_variables(text: str) -> list[str]:
         """
         Extracts all unique JSONPath variables from the given text.
         """
-        pattern = r'\$\.\S*'
-        return list(set(Utils._match(pattern, text)))
+        return list(set(Utils._match(_JSONPATH_VARIABLE_RE, text)))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def extract_terms(text: str) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        """
+        Extracts the JSONPath variables and the constants of the given text in a single regex sweep.
+        Returns (jsonpath_variables, constants), both in order of appearance.
+        """
+        paramns = []
+        constants = []
+
+        for jsonpath, constant in _JSONPATH_OR_CONSTANT_RE.findall(text):
+            if jsonpath:
+                paramns.append(jsonpath)
+            else:
+                constants.append(constant)
+
+        return tuple(paramns), tuple(constants)
 
     @staticmethod
     def jsonpath_query(obj: Any, expr: str) -> Any:
@@ -39,12 +167,20 @@ class Utils:
         Takes a JSON object (Python dict/list) and a JSONPath expression,
         returns a list with the values found or a single value if only one match.
         """
+        return Utils._find_jsonpath(Utils._compile_jsonpath(expr), obj)
+
+    @staticmethod
+    def _compile_jsonpath(expr: str) -> Any:
+        """Compile a JSONPath expression, raising ValueError when it is invalid"""
         try:
-            jsonpath_expr = parse(expr)
+            return _parse_jsonpath(expr)
 
         except Exception as e:
             raise ValueError(f"Invalid JSONPath expression: {expr}") from e
 
+    @staticmethod
+    def _find_jsonpath(jsonpath_expr: Any, obj: Any) -> Any:
+        """Apply a compiled JSONPath expression with jsonpath_query's result conventions"""
         matches = jsonpath_expr.find(obj)
         if not matches:
             # raise JSONPathNotFound(f"JSONPath expression not matches: {expr}")
@@ -63,7 +199,7 @@ class Utils:
         mapping = {}
 
         for jsonpath in paramns:
-            param_name = re.sub(r'[^a-zA-Z0-9_]', '_', jsonpath[1:])
+            param_name = _jsonpath_to_param(jsonpath)
             mapping[param_name] = jsonpath
 
         return mapping
@@ -71,8 +207,7 @@ class Utils:
     @staticmethod
     def remove_single_word_parentheses(text):
         """Remove parentheses that surround only a single word (with optional whitespace)"""
-        pattern = r'\(\s*([a-zA-Z_][a-zA-Z0-9_]*)\s*\)'
-        return re.sub(pattern, r'\1', text)
+        return _SINGLE_WORD_PARENS_RE.sub(r'\1', text)
 
     @staticmethod
     def create_jsonpath_wrapper(cached_function, jsonpath_params: dict[str, str]):
@@ -86,27 +221,62 @@ class Utils:
         Returns:
             A wrapper function that accepts raw data and applies JSONPath extraction
         """
+        accessors = [
+            (param_name, Utils.build_jsonpath_accessor(jsonpath_expr))
+            for param_name, jsonpath_expr in jsonpath_params.items()
+        ]
+
         def wrapper(data: dict[str, Any]) -> Any:
             """
             Wrapper function that extracts data using JSONPath and calls the cached function
             """
-            params = {}
-
-            for param_name, jsonpath_expr in jsonpath_params.items():
-                try:
-                    value = Utils.jsonpath_query(data, jsonpath_expr)
-                    params[param_name] = value
-
-                except ValueError as e:
-                    # Handle missing values - you might want to use default values or raise
-                    warning(
-                        f"Utils - create_jsonpath_wrapper - wrapper - Warning: Could not extract {jsonpath_expr}: {e}")
-                    params[param_name] = None
+            params = {
+                param_name: accessor(data) for param_name, accessor in accessors
+            }
 
             return cached_function(**params)
 
         return wrapper
 
+    @staticmethod
+    def build_jsonpath_accessor(jsonpath_expr: str) -> Callable[[Any], Any]:
+        """
+        Build a function that returns the value at jsonpath_expr the way jsonpath_query does.
+        Plain dotted paths ($.a.b) are resolved with direct dict lookups, skipping the JSONPath engine.
+
+        Args:
+            jsonpath_expr: The JSONPath expression to resolve
+
+        Returns:
+            A function taking the raw data and returning the value, or '__not_matches__'
+        """
+        if not _SIMPLE_JSONPATH_RE.fullmatch(jsonpath_expr):
+            # Invalid expressions are reported once here, not on every record
+            try:
+                compiled = Utils._compile_jsonpath(jsonpath_expr)
+
+            except ValueError as e:
+                warning(
+                    f"Utils - create_jsonpath_wrapper - wrapper - Warning: Could not extract {jsonpath_expr}: {e}")
+                return lambda data: None
+
+            def query(data: Any) -> Any:
+                return Utils._find_jsonpath(compiled, data)
+
+            return query
+
+        keys = tuple(jsonpath_expr[2:].split('.'))
+
+        def lookup(data: Any) -> Any:
+            value = data
+            for key in keys:
+                if not isinstance(value, dict) or key not in value:
+                    return '__not_matches__'
+                value = value[key]
+            return value
+
+        return lookup
+
 
 class CacheHandler:
     """
@@ -117,10 +287,12 @@ class CacheHandler:
         conditions (list[str]): A list of conditions that define the choice configuration.
         states (dict[str, Any]): A dictionary representing the states relevant to the choice.
         content_hash (str): The SHA256 hash representing the current configuration for cache validation.
+        safe_name (str): The choice name as a Python identifier, used for cache files and the generated function.
     """
 
     def __init__(self, name: str, conditions: list[str], states: dict[str, Any]) -> None:
         self.name = name
+        self.safe_name = name.replace('-', '_')
         self.conditions = conditions
         self.states = states
         self.content_hash = ''
@@ -146,22 +318,20 @@ class CacheHandler:
 
         if metadata:
             cache_file_path = metadata['cache_file']
-            cached_code = self._load_from_cache(cache_file_path)
-            if cached_code:
+            if self._has_cached_code(cache_file_path):
                 info(
                     f"CacheHandler - get_path_from_cache - Using cached function for '{self.name}' (hash: {self.content_hash[:8]})")
                 return cache_file_path
 
         return None
 
-    def _load_from_cache(self, cache_file_path) -> str:
-        """Load the cached function code"""
+    def _has_cached_code(self, cache_file_path) -> bool:
+        """Check that the cached function file exists and is not empty, without reading it"""
 
         try:
-            with open(cache_file_path, 'r') as f:
-                return f.read()
+            return os.stat(cache_file_path).st_size > 0
         except FileNotFoundError:
-            return ""
+            return False
 
     def is_cache_valid(self) -> dict[str, Any] | None:
         """Check if cache is valid for the given choice and hash"""
@@ -173,8 +343,7 @@ class CacheHandler:
 
         metadata_path = self._get_path("metadata.json")
         try:
-            with open(metadata_path, 'r') as f:
-                metadata = json.load(f)
+            metadata = _read_metadata(metadata_path)
 
             return metadata if metadata.get('hash') == self.content_hash else None
         except (FileNotFoundError, json.JSONDecodeError, KeyError):
@@ -186,22 +355,15 @@ class CacheHandler:
 
     def _get_path(self, filename) -> str:
 
-        cache_dir: str = os.path.join(
-            os.path.dirname(__file__),
-            'conditions_cache'
-        )
-
-        safe_choice_name: str = self.name.replace('-', '_')
-        filename = f"{safe_choice_name}_{filename}"
+        filename = f"{self.safe_name}_{filename}"
 
-        return os.path.join(cache_dir, filename)
+        return os.path.join(_CACHE_DIR, filename)
 
     def _save_to_cache(self, function_code: str, jsonpath_params: dict[str, str] | None = None) -> str:
         """Save the generated function to cache and return the file path"""
         name = self.name
-        cache_dir = os.path.join(os.path.dirname(__file__), 'conditions_cache')
 
-        os.makedirs(cache_dir, exist_ok=True)
+        os.makedirs(_CACHE_DIR, exist_ok=True)
 
         cache_file_path = self._get_cache_file_path()
         metadata_path = self._get_path("metadata.json")
@@ -209,8 +371,7 @@ class CacheHandler:
         self._cleanup_old_cache()
 
         # Save the function code
-        with open(cache_file_path, 'w') as f:
-            f.write(function_code)
+        write_atomic(cache_file_path, function_code)
 
         # Save metadata
         metadata = {
@@ -221,43 +382,40 @@ class CacheHandler:
             'jsonpath_params': jsonpath_params or {}
         }
 
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata, f, indent=2)
+        write_atomic(metadata_path, json.dumps(metadata, indent=2))
 
         return cache_file_path
 
     def _cleanup_old_cache(self) -> None:
         """Remove old cache files for the same choice"""
 
-        cache_dir = os.path.join(os.path.dirname(__file__), 'conditions_cache')
-        safe_choice_name = self.name.replace('-', '_')
+        current_file = f"{self.safe_name}_{self.content_hash[:8]}"
 
-        if not os.path.exists(cache_dir):
-            return
+        # Only this choice's generated files are listed; a missing directory yields nothing
+        pattern = os.path.join(
+            glob.escape(_CACHE_DIR), f"{glob.escape(self.safe_name)}_*.py")
 
         # Find and remove old cache files
-        for filename in os.listdir(cache_dir):
-            if filename.startswith(f"{safe_choice_name}_") and filename.endswith('.py'):
-                if not filename.startswith(f"{safe_choice_name}_{self.content_hash[:8]}"):
-                    old_file_path = os.path.join(cache_dir, filename)
-                    try:
-                        os.remove(old_file_path)
-                        info(
-                            f"CacheHandler - _cleanup_old_cache - Removed old cache file: {old_file_path}")
-                    except OSError:
-                        pass
+        for old_file_path in glob.iglob(pattern):
+            if not os.path.basename(old_file_path).startswith(current_file):
+                try:
+                    os.remove(old_file_path)
+                    info(
+                        f"CacheHandler - _cleanup_old_cache - Removed old cache file: {old_file_path}")
+                except OSError:
+                    pass
 
     def clear_all_cache(self) -> None:
         """Remove the entire cache directory and all its contents"""
-        import shutil
 
-        cache_dir = Path(__file__).parent / 'conditions_cache'
+        _WRAPPER_CACHE.clear()
+        _METADATA_CACHE.clear()
 
-        if cache_dir.exists():
+        if os.path.exists(_CACHE_DIR):
             try:
-                shutil.rmtree(cache_dir)
+                shutil.rmtree(_CACHE_DIR)
                 info(
-                    f"CacheHandler - clear_all_cache - Removed entire cache directory: {cache_dir}")
+                    f"CacheHandler - clear_all_cache - Removed entire cache directory: {_CACHE_DIR}")
             except OSError as e:
                 warning(
                     f"CacheHandler - clear_all_cache - Failed to remove cache directory: {e}")
@@ -266,6 +424,12 @@ class CacheHandler:
         """
         Load a cached function from a Python file
         """
+        # The content hash pins the generated code, so a built wrapper stays valid
+        key = (self.safe_name, self.content_hash)
+        wrapper = _WRAPPER_CACHE.get(key)
+        if wrapper is not None:
+            return wrapper
+
         metadata = self.is_cache_valid()
         if metadata is None:
             raise FileNotFoundError(
@@ -273,22 +437,18 @@ class CacheHandler:
 
         cache_file_path = metadata['cache_file']
 
-        spec = importlib.util.spec_from_file_location(
-            "cached_module", cache_file_path)
-
-        if spec is None or spec.loader is None:
-            raise ImportError(
-                f"CacheHandler - load_cached_function - Could not load spec from {cache_file_path}")
+        # The file version invalidates the entry when the file is regenerated
+        module = _load_module(cache_file_path, _file_version(cache_file_path))
 
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-
-        function_name = self.name.replace('-', '_')
-        cached_function = getattr(module, function_name)
+        cached_function = getattr(module, self.safe_name)
 
         jsonpath_params = metadata.get('jsonpath_params', {})
 
-        return Utils.create_jsonpath_wrapper(cached_function, jsonpath_params)
+        wrapper = Utils.create_jsonpath_wrapper(
+            cached_function, jsonpath_params)
+        _WRAPPER_CACHE[key] = wrapper
+
+        return wrapper
 
 
 class ConditionParser:
@@ -306,11 +466,19 @@ class ConditionParser:
     - sttm: literal string | when condition then [sttm | term | else term]
     """
 
+    __slots__ = (
+        "name", "conditions", "states", "cache",
+        "_statement_parts", "_processed_statements", "_substituted_conditions",
+    )
+
     def __init__(self, cache_handler: 'CacheHandler') -> None:
         self.name = cache_handler.name
         self.conditions = cache_handler.conditions
         self.states = cache_handler.states
         self.cache = cache_handler
+        self._statement_parts: dict[str, tuple[str, str]] = {}
+        self._processed_statements: dict[tuple[str, int], str] = {}
+        self._substituted_conditions: dict[str, str] = {}
 
     def parse(self) -> str:
         """
@@ -319,8 +487,9 @@ class ConditionParser:
         """
         conditions = self.conditions
 
-        # Generate hash for cache validation
-        self.cache.generate_hash()
+        # Generate hash for cache validation, unless the caller already did
+        if not self.cache.content_hash:
+            self.cache.generate_hash()
         cache_file_path = self.cache.get_path_from_cache()
 
         if cache_file_path:
@@ -330,8 +499,9 @@ class ConditionParser:
         constants = []
 
         for cond in conditions:
-            paramns += Utils.extract_jsonpath_variables(cond)
-            constants += Utils.extract_constants(cond)
+            cond_paramns, cond_constants = Utils.extract_terms(cond)
+            paramns += cond_paramns
+            constants += cond_constants
 
         paramns = list(set(paramns))
 
@@ -358,33 +528,35 @@ class ConditionParser:
         Builds a Python function signature string using sanitized parameter names.
         """
 
-        unique_params = []
-
-        for p in paramns:
-            param_name = re.sub(r'[^a-zA-Z0-9_]', '_', p[1:])
-            unique_params.append(param_name)
+        unique_params = list(
+            dict.fromkeys(_jsonpath_to_param(p) for p in paramns)
+        )
 
-        return f"\ndef {self.name.replace('-', '_')}({', '.join(unique_params)}):\n"
+        return f"\ndef {self.cache.safe_name}({', '.join(unique_params)}):\n"
 
     def _constants_builder(self, constants) -> str:
         """Build constants declarations"""
 
-        unique_constants = list(
-            dict.fromkeys(cte[1:] for cte in constants)
-        )
+        # dict.fromkeys dedupes in order; it is iterated directly, without a list copy
+        unique_constants = dict.fromkeys(cte[1:] for cte in constants)
 
-        const_lines = [
+        const_lines = ''.join([
             f"    {c.replace('-', '_')} = '{self.states[c]['name']}'\n"
             for c in unique_constants
-        ]
+        ])
 
-        return '\n' + ''.join(const_lines) + '\n'
+        return f"\n{const_lines}\n"
 
     def _if_then_else_builder(self, function_builder) -> str:
         """Build if-then-else statements for all conditions"""
 
+        table_body = self._dispatch_table_builder()
+        if table_body is not None:
+            return function_builder + table_body
+
         conditions = self.conditions
         condition_size = len(conditions) - 1
+        parts = [function_builder]
         for i, condition in enumerate(conditions):
 
             if i == condition_size:
@@ -399,14 +571,75 @@ class ConditionParser:
                     raise Exception(
                         f'The final condition has nested conditions, without a default value: {condition}')
 
-            function_builder += "\n" + self._process_statement(condition, 1)
+            parts.append("\n")
+            parts.append(self._process_statement(condition, 1))
+
+        return ''.join(parts)
+
+    def _dispatch_table_builder(self) -> str | None:
+        """
+        Build a dict-lookup body when every condition compares one JSONPath with a literal,
+        e.g. "when $.kind eq 'a' then #state", ending in a default term or an else.
+        Returns None for any other shape, so the if-chain is generated instead.
+        """
+        *cases, last = self.conditions
+        default = None
+
+        if _TERMINAL_RE.fullmatch(last):
+            default = last
+        else:
+            cases.append(last)
+
+        if len(cases) < _DISPATCH_TABLE_MIN_CASES:
+            return None
+
+        jsonpath = None
+        table: dict[Any, tuple[str, str]] = {}
 
-        return function_builder
+        for i, case in enumerate(cases):
+            match = _EQ_CASE_RE.fullmatch(case)
+            if match is None:
+                return None
+
+            case_jsonpath, literal, then_term, else_term = match.groups()
+            if jsonpath is None:
+                jsonpath = case_jsonpath
+            elif case_jsonpath != jsonpath:
+                return None
+
+            if else_term is not None:
+                # Only the last condition may carry the default
+                if i != len(cases) - 1 or default is not None:
+                    return None
+                default = else_term
+
+            # The first matching case wins in an if-chain, so later duplicates are dropped
+            table.setdefault(ast.literal_eval(literal), (literal, then_term))
+
+        if default is None:
+            return None
+
+        entries = ', '.join(
+            f"{literal}: {self._table_value(term)}" for literal, term in table.values()
+        )
+        param = _jsonpath_to_param(jsonpath)
+        default_value = self._table_value(default)
+
+        # Unhashable inputs can never equal a literal, so they fall through to the default
+        return (
+            f"\n    try:\n        return _TABLE.get({param}, {default_value})\n"
+            f"    except TypeError:\n        return {default_value}\n"
+            f"\n\n_TABLE = {{{entries}}}\n"
+        )
+
+    def _table_value(self, term: str) -> str:
+        """Resolve a #constant to its quoted state name; literals are returned as-is"""
+        return f"'{self.states[term[1:]]['name']}'" if term.startswith('#') else term
 
     def add_constants_or_literals(self, indent, statement) -> str | None:
 
         if statement.startswith('#'):
-            return f"{indent}return {statement[1:].replace('-', '_')}\n"
+            return f"{indent}return {self._return_value(statement)}\n"
 
         if statement[0] == "'" and statement[-1] == "'":
             if not "'" in statement[1:-1]:
@@ -414,8 +647,23 @@ class ConditionParser:
 
         return None
 
+    def _return_value(self, term: str) -> str:
+        """Turn a #constant into its generated variable name; other terms are returned as-is"""
+        return term[1:].replace('-', '_') if term.startswith('#') else term
+
     def _process_statement(self, statement: str, indent_level: int = 1) -> str:
         """Process a single statement (could be nested) and return Python code"""
+        key = (statement, indent_level)
+        cached = self._processed_statements.get(key)
+        if cached is not None:
+            return cached
+
+        code = self._build_statement(statement, indent_level)
+        self._processed_statements[key] = code
+        return code
+
+    def _build_statement(self, statement: str, indent_level: int) -> str:
+        """Generate the Python code for one statement, recursing into nested ones"""
         indent = "    " * indent_level
 
         # If it's just a constant, return it
@@ -426,47 +674,51 @@ class ConditionParser:
         condition, then_part = self._extract_nested_statement_parts(statement)
         condition = self._op_substitution(condition)
 
-        while 'exist ' in condition:
-            i = condition.index('exist ')
-            js_path = condition[i+6:].split(' ', 1)[0]
-            term = f"{js_path} != '__not_matches__'"
-            subst = f"exist {js_path}"
-            condition = condition.replace(subst, term)
+        if 'exist ' in condition:
+            condition = _EXIST_RE.sub(r"\1 != '__not_matches__'", condition)
 
         condition = Utils.remove_single_word_parentheses(condition)
 
-        result = f"{indent}if {condition}:\n"
+        parts = [f"{indent}if {condition}:\n"]
 
         if self._is_nested_statement(then_part):
-            result += self._process_statement(then_part, indent_level + 1)
+            parts.append(self._process_statement(then_part, indent_level + 1))
 
         elif ' else ' in then_part:
             _then, _else = then_part.split(' else ')
+            _then = self._return_value(_then)
+            _else = self._return_value(_else)
 
-            _then = _then[1:].replace('-', '_') if _then.startswith('#') else _then  # nopep8
-            _else = _else[1:].replace('-', '_') if _else.startswith('#') else _else  # nopep8
-
-            result += f"{indent}    return {_then}\n{indent}return {_else}\n"
+            parts.append(f"{indent}    return {_then}\n{indent}return {_else}\n")
 
         else:
             ctes_ltr = self.add_constants_or_literals(indent, then_part)
             if ctes_ltr:
-                result += f"    {ctes_ltr}"
+                parts.append(f"    {ctes_ltr}")
 
-        return result
+        return ''.join(parts)
 
     def _extract_nested_statement_parts(self, statement: str) -> tuple[str, str]:
         """
         Extract condition and then-part from a when-then statement
         Returns (condition, then_part)
         """
-        # Simple regex approach first - works for most cases
+        cached = self._statement_parts.get(statement)
+        if cached is not None:
+            return cached
+
+        parts = self._split_nested_statement(statement)
+        self._statement_parts[statement] = parts
+        return parts
+
+    def _split_nested_statement(self, statement: str) -> tuple[str, str]:
+        """Split a when-then statement in a single compiled-regex pass"""
+        # Simple approach first - works for most cases
         # Pattern to match: when (condition) then (then_part)
         # But we need to be careful with nested statements
-        match = re.search(r'when\s+(.*?)\s+then\s+(.*)', statement, re.DOTALL)
+        match = self._match_when_then(statement)
         if match:
-            condition = match.group(1).strip()
-            then_part = match.group(2).strip()
+            condition, then_part = match
 
             if '$.' in condition:
                 condition = self._convert_jsonpath_to_params(condition)
@@ -479,21 +731,9 @@ class ConditionParser:
                 if when_pos == -1:
                     return condition, then_part
 
-                # Find the corresponding 'then'
-                search_start = when_pos + 4  # after 'when'
-                then_positions = []
-                pos = search_start
-
-                while True:
-                    then_pos = statement.find('then', pos)
-                    if then_pos == -1:
-                        break
-                    then_positions.append(then_pos)
-                    pos = then_pos + 4
-
-                if then_positions:
-                    # Take the first 'then' that follows our 'when'
-                    first_then = then_positions[0]
+                # Take the first 'then' that follows our 'when'
+                first_then = statement.find('then', when_pos + 4)
+                if first_then != -1:
                     condition = statement[when_pos + 4:first_then].strip()
                     then_part = statement[first_then + 4:].strip()
 
@@ -501,68 +741,74 @@ class ConditionParser:
 
         return "", statement
 
+    def _match_when_then(self, statement: str) -> tuple[str, str] | None:
+        """Return the stripped (condition, then_part) of the first when-then, or None"""
+        when_pos = statement.find('when')
+
+        # Without both keywords neither the slicing nor the regex can match
+        if when_pos == -1 or statement.find('then', when_pos + 4) == -1:
+            return None
+
+        when_pos = statement.find('when ', when_pos)
+
+        # With plain spaces as the only whitespace, slicing matches the regex exactly
+        if when_pos != -1 and statement.isprintable():
+            # The regex consumes every space after 'when' before the condition starts
+            condition_pos = len(statement) - len(statement[when_pos + 4:].lstrip(' '))
+            then_pos = statement.find(' then ', condition_pos)
+            if then_pos != -1:
+                return statement[condition_pos:then_pos].strip(), statement[then_pos + 6:].strip()
+
+        match = _WHEN_THEN_RE.search(statement)
+        if match:
+            return match.group(1).strip(), match.group(2).strip()
+
+        return None
+
     def _convert_jsonpath_to_params(self, condition) -> str:
         """Convert JSONPath expressions ($.) to parameter names"""
 
         # Find all JSONPath expressions - match $.word but stop at non-word characters
-        jsonpath_pattern = r'\$\.([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)'
+        if '$.' in condition:
+            condition = _JSONPATH_PARAM_RE.sub(_replace_jsonpath, condition)
 
-        def replace_jsonpath(match):
-            jsonpath_content = match.group(1)  # Get the part after $.
-            # Convert user.name -> _user_name (replace dots with underscores)
-            param_name = '_' + jsonpath_content.replace('.', '_')
-            return param_name
-
-        condition = re.sub(jsonpath_pattern, replace_jsonpath, condition)
-
-        terms = {' true': ' True', ' false': ' False', ' null': ' None'}
-        for term, new_term in terms.items():
-            condition = condition.replace(term, new_term)
+        # Substring checks keep the common literal-free condition off the regex
+        if ' true' in condition or ' false' in condition or ' null' in condition:
+            condition = _LITERAL_TERM_RE.sub(_replace_literal_term, condition)
 
         return condition
 
     def _handle_contains_operator(self, condition) -> str:
         # Handle contains: X contains Y -> Y in X
-        pattern = r'(.+?)\s+contains\s+(.+)'
-        match = re.match(pattern, condition.strip())
+        if 'contains' not in condition:
+            return condition
+
+        match = _CONTAINS_RE.match(condition)
         if match:
-            term_1 = match.group(1).strip()
-            term_2 = match.group(2).strip()
             # Troca os termos e substitui 'contains' por 'in'
-            condition = f"{term_2} in {term_1}"
+            condition = f"{match[2]} in {match[1]}"
 
         return condition
 
     def _handle_string_operators(self, condition) -> str:
+        # A substring check skips both regex passes for the common no-op case
         # Handle starts_with: X starts_with Y -> X.startswith(Y)
-        condition = re.sub(
-            r'(\w+)\s+starts_with\s+(\'[^\']*\')', r'\1.startswith(\2)', condition)
-        condition = re.sub(r'(\w+)\s+starts_with\s+(\w+)',
-                           r'\1.startswith(\2)', condition)
+        if 'starts_with' in condition:
+            condition = _STARTS_WITH_QUOTED_RE.sub(r'\1.startswith(\2)', condition)
+            condition = _STARTS_WITH_WORD_RE.sub(r'\1.startswith(\2)', condition)
 
         # Handle ends_with: X ends_with Y -> X.endswith(Y)
-        condition = re.sub(
-            r'(\w+)\s+ends_with\s+(\'[^\']*\')', r'\1.endswith(\2)', condition)
-        condition = re.sub(r'(\w+)\s+ends_with\s+(\w+)',
-                           r'\1.endswith(\2)', condition)
+        if 'ends_with' in condition:
+            condition = _ENDS_WITH_QUOTED_RE.sub(r'\1.endswith(\2)', condition)
+            condition = _ENDS_WITH_WORD_RE.sub(r'\1.endswith(\2)', condition)
 
         return condition
 
     def _handle_comparison_operators(self, condition) -> str:
         # Basic comparison operators
 
-        ops = [
-            [r'\s+gt\s+', ' > '],
-            [r'\s+lt\s+', ' < '],
-            [r'\s+eq\s+', ' == '],
-            [r'\s+neq\s+', ' != '],
-            [r'\s+gte\s+', ' >= '],
-            [r'\s+lte\s+', ' <= '],
-        ]
-
-        for reg, op in ops:
-            condition = re.sub(reg, op, condition)
-        return condition
+        return _COMPARISON_OP_RE.sub(
+            lambda match: _COMPARISON_OPS[match[1]], condition)
 
     def _is_nested_statement(self, then_part: str) -> bool:
         """Check if the then part contains another when-then statement"""
@@ -570,10 +816,14 @@ class ConditionParser:
 
     def _op_substitution(self, condition) -> str:
         """Convert custom operators to Python operators"""
+        cached = self._substituted_conditions.get(condition)
+        if cached is not None:
+            return cached
 
         text = self._convert_jsonpath_to_params(condition)
         text = self._handle_contains_operator(text)
         text = self._handle_string_operators(text)
         text = self._handle_comparison_operators(text)
 
+        self._substituted_conditions[condition] = text
         return text
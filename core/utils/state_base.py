@@ -1,4 +1,5 @@
-from typing import Any, Optional
+import threading
+from typing import Any, Callable, Optional
 from enum import Enum
 
 
@@ -11,12 +12,59 @@ class StateType(Enum):
 
 class State:
 
+    __slots__ = ("name", "type", "next_state", "timeout")
+
     def __init__(self, name: str, next_state: str | None, type: StateType, timeout: Optional[int] = None) -> None:
         self.name = name
         self.type = type.value
         self.next_state = next_state
         self.timeout = timeout if timeout else 60
 
+    def materialize(self) -> "State":
+        """Return the state that handles events; regular states are already built."""
+        return self
+
     def handler(self, event: Any, context: dict[str, Any]) -> Any:
         raise NotImplementedError(
             "Handler method must be implemented by subclasses.")
+
+
+class LazyState(State):
+    """
+    Stand-in for a state whose construction is deferred until it first runs.
+
+    Args:
+        factory (Callable[..., State]): Class or callable that builds the real state.
+        args (tuple[Any, ...]): Positional arguments passed to the factory.
+        name (str): The name of the state.
+        next_state (str | None): The next state known before the state is built.
+        type (StateType): Type of the state being built.
+        timeout (Optional[int], optional): Timeout the machine uses before the state is built.
+    """
+
+    __slots__ = ("_factory", "_args", "_state", "_lock")
+
+    def __init__(self, factory: Callable[..., State], args: tuple[Any, ...], name: str, next_state: str | None, type: StateType, timeout: Optional[int] = None) -> None:
+        super().__init__(name, next_state, type, timeout)
+        self._factory = factory
+        self._args = args
+        self._state: State | None = None
+        self._lock = threading.Lock()
+
+    def materialize(self) -> State:
+        """Build the real state on first use and return the cached instance afterwards."""
+        state = self._state
+        if state is None:
+            # Concurrent first runs, e.g. from Parallel workflows, build the state once
+            with self._lock:
+                state = self._state
+                if state is None:
+                    state = self._state = self._factory(*self._args)
+        return state
+
+    def handler(self, event: Any, context: dict[str, Any]) -> Any:
+        state = self.materialize()
+        result = state.handler(event, context)
+        # Choice states pick their next state while handling the event
+        self.next_state = state.next_state
+        return result
@@ -8,10 +8,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def debug_enabled() -> bool:
+    """Whether DEBUG records are currently emitted; checked at call time so level changes apply."""
+    return logger.isEnabledFor(logging.DEBUG)
+
+
+def debug(fmt: str, *args: Any) -> None:
+    """Log at DEBUG deferring the %-formatting until the record is emitted."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(fmt, *args)
+
+
 def info(message: Any) -> None:
     logger.info(message)
 
 
+def info_lazy(fmt: str, *args: Any) -> None:
+    """Log at INFO deferring the %-formatting until the record is emitted."""
+    logger.info(fmt, *args)
+
+
 def error(error_message: Any) -> None:
     logger.error(error_message)
 
@@ -17,10 +17,18 @@ Definição testada:
 """
 
 import unittest
+import os
+import stat
 import sys
+import tempfile
+import threading
 from pathlib import Path
+from unittest.mock import patch
 
+from core.exceptions import ChoiceInitializationError
 from core.handlers.choice_handler import Choice
+from core.utils.file_utils import write_atomic
+from core.utils.parser import CacheHandler, ConditionParser, _read_metadata
 
 # Adicionar o diretório test-cache ao path
 test_cache_dir = Path(__file__).parent.parent.parent / "test-cache"
@@ -233,6 +241,173 @@ class TestValidConditions(unittest.TestCase):
 
         self.act_and_assert("test_ends_with_condition", conditions, test_list)
 
+    def test_nested_jsonpath_condition(self):
+        """Testa caminhos JSONPath aninhados, inclusive quando a chave não existe."""
+
+        conditions = [
+            "when exist $.user.age then #match else #no-match"
+        ]
+
+        test_list = [
+            {'input': {'user': {'age': 30}}, 'state': 'match'},
+            {'input': {'user': {'name': 'Ana'}}, 'state': 'no-match'},
+            {'input': {'user': 'Ana'}, 'state': 'no-match'},
+        ]
+
+        self.act_and_assert("test_nested_jsonpath_condition", conditions, test_list)
+
+    def test_equality_dispatch_table(self):
+        """Testa uma cadeia de igualdades sobre o mesmo JSONPath, gerada como tabela de despacho."""
+
+        conditions = [
+            "when $.kind eq 'a' then #match",
+            "when $.kind eq 'b' then #no-match",
+            "when $.kind eq 10 then 'string_match'",
+            "when $.kind eq 'a' then #no-match",
+            "#default"
+        ]
+
+        test_list = [
+            {'input': {'kind': 'a'}, 'state': 'match'},
+            {'input': {'kind': 'b'}, 'state': 'no-match'},
+            {'input': {'kind': 10}, 'literal': 'string_match'},
+            {'input': {'kind': 'c'}, 'state': 'default'},
+            {'input': {'kind': ['a']}, 'state': 'default'},
+            {'input': {'other': 'a'}, 'state': 'default'},
+        ]
+
+        self.act_and_assert("test_equality_dispatch_table", conditions, test_list)
+
+    def test_literal_words_inside_strings(self):
+        """Testa se true/false/null dentro de strings têm o mesmo resultado no if-chain e na tabela de despacho."""
+
+        cases = [
+            "when $.kind eq 'a null' then #match",
+            "when $.kind eq 'is true' then #match",
+            "when $.kind eq 'b' then #no-match",
+            "when $.kind eq 'c' then #no-match",
+        ]
+
+        test_list = [
+            {'input': {'kind': 'a null'}, 'state': 'match'},
+            {'input': {'kind': 'is true'}, 'state': 'match'},
+            {'input': {'kind': 'a None'}, 'state': 'default'},
+        ]
+
+        # Três casos geram um if-chain, quatro geram a tabela de despacho
+        self.act_and_assert(
+            "test_literal_words_if_chain", cases[:3] + ["#default"], test_list)
+        self.act_and_assert(
+            "test_literal_words_dispatch_table", cases + ["#default"], test_list)
+
+    def test_warm_cache_skips_parser(self):
+        """Testa se uma choice com cache válido é carregada sem gerar o código novamente."""
+
+        conditions = [
+            "when $.age gt 10 then #match else #no-match"
+        ]
+
+        choice_name = "test_warm_cache_skips_parser"
+        Choice(choice_name, conditions, self.states)
+
+        with patch.object(ConditionParser, 'parse') as mock_parse:
+            choice = Choice(choice_name, conditions, self.states)
+
+        mock_parse.assert_not_called()
+        choice.handler({'age': 20}, {})
+        self.assertEqual(choice.next_state, 'string_match')
+        choice.cache_handler.clear_all_cache()
+
+    def test_prepare_generates_code_without_loading(self):
+        """Testa se Choice.prepare gera o código em cache e a choice construída depois o reutiliza."""
+
+        conditions = [
+            "when $.age gt 10 then #match else #no-match"
+        ]
+
+        choice_name = "test_prepare_generates_code_without_loading"
+        with patch.object(CacheHandler, 'load_cached_function') as mock_load:
+            Choice.prepare(choice_name, conditions, self.states)
+
+        mock_load.assert_not_called()
+
+        with patch.object(ConditionParser, 'parse') as mock_parse:
+            choice = Choice(choice_name, conditions, self.states)
+
+        mock_parse.assert_not_called()
+        choice.handler({'age': 20}, {})
+        self.assertEqual(choice.next_state, 'string_match')
+        choice.cache_handler.clear_all_cache()
+
+    def test_prepare_rejects_malformed_conditions(self):
+        """Testa se Choice.prepare rejeita condições malformadas antes de a choice ser construída."""
+
+        conditions = [
+            "when $.age gt 10 then #match"
+        ]
+
+        with self.assertRaises(ChoiceInitializationError):
+            Choice.prepare(
+                "test_prepare_rejects_malformed_conditions", conditions, self.states)
+
+
+class TestCacheFiles(unittest.TestCase):
+    """Testa os auxiliares de gravação e leitura dos arquivos de cache."""
+
+    def test_atomic_write_file_mode(self):
+        """Testa se o arquivo gravado recebe o mesmo modo que um open() comum criaria."""
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, "choice.py")
+            plain_path = os.path.join(cache_dir, "plain.py")
+
+            write_atomic(path, "x")
+            with open(plain_path, 'w') as f:
+                f.write("x")
+
+            self.assertEqual(
+                stat.S_IMODE(os.stat(path).st_mode),
+                stat.S_IMODE(os.stat(plain_path).st_mode))
+
+    def test_concurrent_atomic_writes(self):
+        """Testa se várias threads gravando o mesmo arquivo de cache ao mesmo tempo não falham."""
+
+        errors = []
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, "choice.py")
+
+            def write():
+                for _ in range(200):
+                    try:
+                        write_atomic(path, "x" * 10000)
+                    except Exception as e:
+                        errors.append(e)
+
+            threads = [threading.Thread(target=write) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(os.listdir(cache_dir), ["choice.py"])
+
+    def test_metadata_rewrite_with_same_mtime(self):
+        """Testa se o metadata regravado com o mesmo mtime e tamanho não é servido do cache antigo."""
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            path = os.path.join(cache_dir, "choice_metadata.json")
+
+            write_atomic(path, '{"hash": "aaaa"}')
+            mtime_ns = os.stat(path).st_mtime_ns
+            self.assertEqual(_read_metadata(path), {"hash": "aaaa"})
+
+            # Simula um sistema de arquivos com resolução grosseira de tempo
+            write_atomic(path, '{"hash": "bbbb"}')
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+            self.assertEqual(_read_metadata(path), {"hash": "bbbb"})
+
 
 if __name__ == "__main__":
     unittest.main(verbosity=2, buffer=True)
@@ -1,4 +1,5 @@
 import unittest
+import threading
 import concurrent.futures
 from unittest.mock import patch, MagicMock
 
@@ -166,6 +167,30 @@ class TestParallel(unittest.TestCase):
                     kwargs.get('timeout'),
                     self.parallel_handler.timeout)
 
+    def test_concurrent_invocations_do_not_share_workers(self):
+        """Test concurrent handler calls each get their own workers instead of queueing."""
+        # Every workflow run waits for all four runs (2 workflows x 2 calls) to start
+        barrier = threading.Barrier(4, timeout=2)
+
+        def run(event, context):
+            barrier.wait()
+            return event
+
+        self.mock_workflow1.run.side_effect = run
+        self.mock_workflow2.run.side_effect = run
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=2) as callers:
+            calls = [
+                callers.submit(self.parallel_handler.handler, i, {})
+                for i in range(2)
+            ]
+            results = [call.result() for call in calls]
+
+        self.assertEqual(results, [
+            {"workflow1": 0, "workflow2": 0},
+            {"workflow1": 1, "workflow2": 1}
+        ])
+
 
 if __name__ == '__main__':
     unittest.main()
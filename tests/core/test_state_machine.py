@@ -1,10 +1,13 @@
 import unittest
+import threading
+import time
 import concurrent.futures
 from unittest.mock import patch, MagicMock
 
 from core.exceptions import StateMachineExecutionError, StateNotFoundError
 from core.handlers.lambda_handler import Lambda
 from core.state_machine import StateMachine
+from core.utils.state_base import LazyState, StateType
 
 
 class TestStateMachine(unittest.TestCase):
@@ -148,6 +151,72 @@ class TestStateMachine(unittest.TestCase):
         with self.assertRaises(StateMachineExecutionError):
             machine.run({"input": "test_data"})
 
+    def test_lazy_state_built_on_first_run(self):
+        """Test that a LazyState only builds its state when the machine first runs it."""
+        factory = MagicMock(return_value=self.lambda_3)
+        lazy_state = LazyState(
+            factory, ("lambda_3", None), "lambda_3", None, StateType.LAMBDA, timeout=2)
+
+        machine = StateMachine(
+            "test_machine", [self.lambda_1, self.lambda_2, lazy_state])
+        factory.assert_not_called()
+
+        machine.run({"input": "test_data"})
+        result = machine.run({"input": "test_data"})
+
+        factory.assert_called_once_with("lambda_3", None)
+        self.assertEqual(result, {"key": "value3", "result": "final"})
+
+    def test_debug_log_keeps_input_of_mutating_state(self):
+        """Test that DEBUG enabled at runtime logs each state's input before the state mutates it."""
+        def mutate(event, context):
+            event["key"] = "mutated"
+            return event
+
+        self.lambda3_handler.side_effect = mutate
+        machine = StateMachine("test_machine", [self.lambda_3])
+
+        with self.assertLogs("logging_config", level="DEBUG") as logs:
+            machine.run({"key": "original"})
+
+        self.assertIn(
+            "STATE lambda_3 in={'key': 'original'} out={'key': 'mutated'}",
+            "\n".join(logs.output))
+
+    def test_lazy_state_built_outside_state_timeout(self):
+        """Test that a LazyState is built by the machine thread, not inside the timed step."""
+        build_threads = []
+
+        def factory(*args):
+            build_threads.append(threading.current_thread())
+            return self.lambda_3
+
+        lazy_state = LazyState(
+            factory, ("lambda_3", None), "lambda_3", None, StateType.LAMBDA, timeout=2)
+
+        machine = StateMachine(
+            "test_machine", [self.lambda_1, self.lambda_2, lazy_state])
+        machine.run({"input": "test_data"})
+
+        self.assertEqual(build_threads, [threading.current_thread()])
+
+    def test_lazy_state_built_once_concurrently(self):
+        """Test that concurrent first uses of a LazyState build the state only once."""
+        def factory(*args):
+            time.sleep(0.05)
+            return self.lambda_3
+
+        factory_mock = MagicMock(side_effect=factory)
+        lazy_state = LazyState(
+            factory_mock, ("lambda_3", None), "lambda_3", None, StateType.LAMBDA, timeout=2)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as executor:
+            states = list(executor.map(
+                lambda _: lazy_state.materialize(), range(8)))
+
+        factory_mock.assert_called_once_with("lambda_3", None)
+        self.assertTrue(all(state is self.lambda_3 for state in states))
+
     @patch('time.time')
     def test_machine_timeout(self, mock_time):
         """Test that TimeoutError is raised when the state machine execution exceeds timeout."""